@@ -22,27 +22,102 @@ import zmq
 import msgpack
 import argparse
 import os
-import stat
 import sys
+import signal
 from zmq.utils import z85
 from zmq.auth import load_certificate, create_certificates
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd  # Import pandas
-import threading
+import multiprocessing
 import time
+import ctypes
+import functools
+from collections import deque, namedtuple
+from multiprocessing import resource_tracker, shared_memory
 import matplotlib.ticker as ticker
 from matplotlib.gridspec import GridSpec
 
-data_lock = threading.Lock()
-frequency_df = pd.DataFrame(columns=['last', 'min', 'max', 'timestamp'])
-message_timestamps = []
+# Numba is optional; without it spectrum updates fall back to NumPy ufuncs
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# pyqtgraph is optional; it is only needed for --frontend pyqtgraph
+try:
+    import pyqtgraph as pg
+    from pyqtgraph.Qt import QtCore, QtWidgets
+except ImportError:
+    pg = None
+
+# Shared with the subscriber process; created in main() and handed over
+data_lock = None
+messages_per_second = None
+spectrum_seq = None
+grid_descriptor = None
+
+message_timestamps = deque()
+
+# Upper bound on frames merged into a single process_data() call
+MAX_BATCH_MESSAGES = 256
+
+# The plot pumps GUI events at 10 Hz but redraws at most once per second,
+# and only when new data arrived
+GUI_POLL_INTERVAL = 0.1
+PLOT_REFRESH_INTERVAL = 1.0
+
+FREQ_LABEL = "Freq (MHz)"
+MAG_LABEL = "Mag (dB)"
+PEAK_TABLE_HEADERS = [ FREQ_LABEL, MAG_LABEL ]
+
+# Peak tracking: strongest maxima in the scatter, rows per peak table
+PEAK_COUNT = 1000
+DISPLAYED_PEAKS = 15
+
+# Spectrum state, one array per column over a uniform frequency grid:
+# bin i covers spectrum_f0 + i * spectrum_bin_hz. Only bins
+# spectrum_lo..spectrum_hi-1 are in use, and unseen bins hold NaN.
+# The columns live in a shared memory block owned by the subscriber
+# process. The block's capacity doubles whenever the grid outgrows it,
+# and the newest block and used range are published in grid_descriptor.
+# The plot process only ever needs the latest block, so nothing is
+# queued between the two.
+spectrum_shm = None
+spectrum_f0 = None
+spectrum_bin_hz = None
+spectrum_lo = 0
+spectrum_hi = 0
+spectrum_last = np.empty(0, dtype=np.float32)
+spectrum_min = np.empty(0, dtype=np.float32)
+spectrum_max = np.empty(0, dtype=np.float32)
+spectrum_ts = np.empty(0, dtype=np.float64)
+
+# Wire format of the pwr/pwr2 bin fields
+POWER_BINS_DTYPE = np.dtype('<f4')
+
+# Bytes per grid bin: a float64 timestamp plus three float32 power columns
+SPECTRUM_BIN_BYTES = 8 + 3 * 4
+
+# Grid frequencies in MHz, ascending; only rebuilt when the grid grows
+spectrum_freqs_mhz = np.empty(0, dtype=np.float64)
+
+class SpectrumGridDescriptor(ctypes.Structure):
+    # Shared block currently holding the grid; only accessed with data_lock
+    # held. An empty name means there is no block (yet, or any more).
+    _fields_ = [('name', ctypes.c_char * 32),
+                ('f0', ctypes.c_double),
+                ('bin_hz', ctypes.c_double),
+                ('num_bins', ctypes.c_int64),
+                ('lo', ctypes.c_int64),
+                ('hi', ctypes.c_int64)]
 
 def parse_args():
     parser = argparse.ArgumentParser(description='ZeroMQ Subscriber with CURVE encryption')
     parser.add_argument('-k', '--key-dir', help='Directory to store/load CURVE keys')
     parser.add_argument('-s', '--server-address', default='tcp://localhost:5555', help='ZeroMQ server address')
     parser.add_argument('-p', '--server-public-key', help='Path to server public key file (if not in key directory)')
+    parser.add_argument('-f', '--frontend', choices=['matplotlib', 'pyqtgraph'], default='matplotlib',
+                        help='Plotting frontend (pyqtgraph is faster for large spectra)')
     args = parser.parse_args()
     return args
 
@@ -51,16 +126,29 @@ def ensure_keys_exist(key_dir):
     client_secret_key_file = os.path.join(key_dir, 'client.key_secret')
     server_public_key_file = os.path.join(key_dir, 'server.key')
 
-    if not os.path.exists(key_dir):
-        os.makedirs(key_dir, mode=0o700)
+    os.makedirs(key_dir, mode=0o700, exist_ok=True)
 
     # Check if client keys exist
-    if not os.path.exists(client_public_key_file) or not os.path.exists(client_secret_key_file):
-        # Generate client key pair using zmq.auth
-        create_certificates(key_dir, "client")
-
-        os.chmod(client_public_key_file, stat.S_IRUSR | stat.S_IWUSR)
-        os.chmod(client_secret_key_file, stat.S_IRUSR | stat.S_IWUSR)
+    try:
+        for path in (client_public_key_file, client_secret_key_file):
+            os.close(os.open(path, os.O_RDONLY))
+    except FileNotFoundError:
+        # A leftover half of the pair would be rewritten in place and keep
+        # its old mode, so both files are created afresh
+        for path in (client_public_key_file, client_secret_key_file):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+        # Generate client key pair using zmq.auth. The umask makes the files
+        # owner-only from the moment they are created, instead of chmod-ing
+        # them after the secret has already been written.
+        old_umask = os.umask(0o177)
+        try:
+            create_certificates(key_dir, "client")
+        finally:
+            os.umask(old_umask)
 
         print(f"Generated new client key pair in {key_dir}")
     else:
@@ -68,11 +156,202 @@ def ensure_keys_exist(key_dir):
 
     return client_public_key_file, client_secret_key_file, server_public_key_file
 
-def process_data(data):
-    global frequency_df
-    global spectrogram_df
+def spectrum_arrays(shm, num_bins):
+    # Timestamps go first so every column stays naturally aligned
+    ts = np.ndarray((num_bins,), dtype=np.float64, buffer=shm.buf)
+    offset = ts.nbytes
+
+    columns = []
+    for _ in range(3):
+        columns.append(np.ndarray((num_bins,), dtype=np.float32, buffer=shm.buf, offset=offset))
+        offset += columns[-1].nbytes
+
+    last, mins, maxs = columns
+    return last, mins, maxs, ts
+
+def grow_spectrum_grid(first_bin, last_bin):
+    global spectrum_shm, spectrum_f0, spectrum_lo, spectrum_hi
+    global spectrum_last, spectrum_min, spectrum_max, spectrum_ts
+
+    # Extend the used range to cover bins first_bin..last_bin, returning the
+    # number of bins existing indices shift by. Runs out of room only
+    # O(log N) times per sweep, since the block doubles when it does.
+    # Called by the subscriber with data_lock held.
+    if spectrum_hi > spectrum_lo:
+        lo = min(spectrum_lo, first_bin)
+        hi = max(spectrum_hi, last_bin + 1)
+    else:
+        lo, hi = first_bin, last_bin + 1
+
+    shift = 0
+    if lo < 0 or hi > spectrum_last.size:
+        num_bins = max(2 * spectrum_last.size, hi - lo)
+        spare = num_bins - (hi - lo)
+
+        # Leave the spare room on the side(s) the grid is growing towards
+        if lo < 0 and hi > spectrum_last.size:
+            shift = spare // 2 - lo
+        elif lo < 0:
+            shift = spare - lo
+        else:
+            shift = -lo
+
+        shm = shared_memory.SharedMemory(create=True, size=num_bins * SPECTRUM_BIN_BYTES)
+
+        old_shm = spectrum_shm
+        old_columns = (spectrum_last, spectrum_min, spectrum_max, spectrum_ts)
+
+        spectrum_shm = shm
+        spectrum_last, spectrum_min, spectrum_max, spectrum_ts = spectrum_arrays(shm, num_bins)
+
+        for column, old_column in zip((spectrum_last, spectrum_min, spectrum_max, spectrum_ts), old_columns):
+            column.fill(np.nan)
+            column[spectrum_lo + shift:spectrum_hi + shift] = old_column[spectrum_lo:spectrum_hi]
+
+        # Views into the old block must be gone before it can be closed
+        del old_columns, old_column
+
+        spectrum_f0 -= shift * spectrum_bin_hz
+
+        # Publish the new block before retiring the old one
+        grid_descriptor.name = shm.name.encode()
+        grid_descriptor.f0 = spectrum_f0
+        grid_descriptor.bin_hz = spectrum_bin_hz
+        grid_descriptor.num_bins = num_bins
+
+        if old_shm is not None:
+            old_shm.close()
+            old_shm.unlink()
+
+    spectrum_lo = lo + shift
+    spectrum_hi = hi + shift
+    grid_descriptor.lo = spectrum_lo
+    grid_descriptor.hi = spectrum_hi
+
+    return shift
+
+def sync_spectrum_grid():
+    global spectrum_shm, spectrum_f0, spectrum_bin_hz, spectrum_freqs_mhz
+    global spectrum_lo, spectrum_hi
+    global spectrum_last, spectrum_min, spectrum_max, spectrum_ts
+
+    # Plot process side: attach to the latest block published by the
+    # subscriber. Called with data_lock held, so the block is still alive
+    # unless the subscriber is gone.
+    name = grid_descriptor.name.decode()
+    if not name:
+        return
+
+    attached = spectrum_shm is not None and spectrum_shm.name == name
+    if not attached:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            # Keep showing the block we already have
+            return
+
+        old_shm = spectrum_shm
+        spectrum_shm = shm
+        spectrum_f0 = grid_descriptor.f0
+        spectrum_bin_hz = grid_descriptor.bin_hz
+        num_bins = grid_descriptor.num_bins
+        spectrum_last, spectrum_min, spectrum_max, spectrum_ts = spectrum_arrays(shm, num_bins)
+
+        if old_shm is not None:
+            old_shm.close()
+
+    if attached and (spectrum_lo, spectrum_hi) == (grid_descriptor.lo, grid_descriptor.hi):
+        return
+
+    spectrum_lo = grid_descriptor.lo
+    spectrum_hi = grid_descriptor.hi
+
+    # Bins are laid out by frequency, so the axis stays sorted as it grows
+    spectrum_freqs_mhz = (spectrum_f0 + np.arange(spectrum_lo, spectrum_hi) * spectrum_bin_hz) / 1e6
+
+def release_spectrum_grid(unlink=False):
+    global spectrum_shm, spectrum_lo, spectrum_hi
+    global spectrum_last, spectrum_min, spectrum_max, spectrum_ts
+
+    shm = spectrum_shm
+    spectrum_shm = None
+    spectrum_lo = spectrum_hi = 0
+    spectrum_last = np.empty(0, dtype=np.float32)
+    spectrum_min = np.empty(0, dtype=np.float32)
+    spectrum_max = np.empty(0, dtype=np.float32)
+    spectrum_ts = np.empty(0, dtype=np.float64)
+
+    if shm is not None:
+        shm.close()
+        if unlink:
+            grid_descriptor.name = b''
+            shm.unlink()
+
+@functools.lru_cache(maxsize=None)
+def bin_offsets(num_bins):
+    # Keyed by segment size only, which is fixed by the FFT size, so the
+    # cache stays tiny however many segments a sweep has
+    offsets = np.arange(num_bins, dtype=np.intp)
+    offsets.setflags(write=False)
+    return offsets
+
+def update_spectrum(last, mins, maxs, ts, idx, power_values, timestamps):
+    last[idx] = power_values
+    np.fmin.at(mins, idx, power_values)
+    np.fmax.at(maxs, idx, power_values)
+    ts[idx] = timestamps
+
+if njit is not None:
+    @njit(cache=True)
+    def update_spectrum(last, mins, maxs, ts, idx, power_values, timestamps):
+        # Sequential on purpose: a batch can hit the same bin more than once
+        # and the later frame must win. NaN marks unseen bins, like np.fmin/fmax.
+        for i in range(idx.size):
+            j = idx[i]
+            p = power_values[i]
+
+            last[j] = p
+            if mins[j] != mins[j] or p < mins[j]:
+                mins[j] = p
+            if maxs[j] != maxs[j] or p > maxs[j]:
+                maxs[j] = p
+            ts[j] = timestamps[i]
+
+def apply_segments(indices, powers, timestamps):
+    if not indices:
+        return
+
+    # Apply the whole batch at once; later frames win for 'last'
+    idx = np.concatenate(indices)
+    power_values = np.concatenate(powers)
+    timestamps = np.concatenate(timestamps)
+
+    with data_lock:
+        idx += grow_spectrum_grid(idx.min(), idx.max())
+
+        update_spectrum(spectrum_last, spectrum_min, spectrum_max, spectrum_ts,
+                        idx, power_values, timestamps)
+        spectrum_seq.value += 1
+
+def reset_spectrum_grid():
+    global spectrum_f0, spectrum_bin_hz
 
+    # Drop the grid so the next segment anchors a new one
     with data_lock:
+        release_spectrum_grid(unlink=True)
+        spectrum_seq.value += 1
+
+    spectrum_f0 = None
+    spectrum_bin_hz = None
+
+def process_data(frames):
+    global spectrum_f0, spectrum_bin_hz
+
+    indices = []
+    powers = []
+    timestamps = []
+
+    for data in frames:
         # Extract frequency ranges and power values
         freq_ranges = [
             (data['sec'], data['usec'], data['start'], data['end'], data['pwr']),
@@ -86,65 +365,118 @@ def process_data(data):
 
             timestamp = time_sec + time_usec / 1e6
 
+            # Publishers send little-endian float32 bytes; older ones send a
+            # list of floats
+            if isinstance(power_values, bytes):
+                power_values = np.frombuffer(power_values, dtype=POWER_BINS_DTYPE).astype(np.float32, copy=False)
+            else:
+                power_values = np.asarray(power_values, dtype=np.float32)
+
             # Number of bins in this range
-            num_bins = len(power_values)
-
-            # Generate frequency bins
-            freqs = np.linspace(start_freq, end_freq, num_bins, endpoint=False)
-
-            # Convert frequencies to integer Hz
-            freqs_int = freqs.astype(int)
-
-            # Create a DataFrame from the frequencies and power values
-            df_new = pd.DataFrame({
-                'timestamp': timestamp,
-                'frequency': freqs_int,
-                'power': power_values
-            })
-
-            df_new.set_index('frequency', inplace=True)
-
-            # Update the main DataFrame
-            for freq in df_new.index:
-                power = df_new.at[freq, 'power']
-
-                if freq in frequency_df.index:
-                    frequency_df.at[freq, 'last'] = power
-                    frequency_df.at[freq, 'min'] = min(power, frequency_df.at[freq, 'min'])
-                    frequency_df.at[freq, 'max'] = max(power, frequency_df.at[freq, 'max'])
-                    frequency_df.at[freq, 'timestamp'] = timestamp
-                else:
-                    frequency_df.loc[freq] = {
-                        'timestamp': timestamp,
-                        'last': power,
-                        'min': power,
-                        'max': power
-                    }
-
-        # Ensure the index is sorted
-        frequency_df.sort_index(inplace=True)
+            num_bins = power_values.size
+            if num_bins == 0:
+                continue
+
+            bin_hz = (end_freq - start_freq) / num_bins
+
+            # A publisher restarted with another bin width would smear its
+            # segments over the old grid, so start over at the new width
+            if spectrum_f0 is not None and abs(bin_hz - spectrum_bin_hz) > spectrum_bin_hz * 1e-6:
+                print(f"Bin width changed from {spectrum_bin_hz} Hz to {bin_hz} Hz, resetting the spectrum.")
+                apply_segments(indices, powers, timestamps)
+                indices, powers, timestamps = [], [], []
+                reset_spectrum_grid()
+
+            # The first frame anchors the grid; all sweep segments share its bin width
+            if spectrum_f0 is None:
+                spectrum_f0 = start_freq
+                spectrum_bin_hz = bin_hz
+
+            # A segment covers consecutive grid bins starting at start_freq
+            first_bin = round((start_freq - spectrum_f0) / spectrum_bin_hz)
+            indices.append(first_bin + bin_offsets(num_bins))
+            powers.append(power_values)
+            timestamps.append(np.full(num_bins, timestamp))
+
+    apply_segments(indices, powers, timestamps)
 
 def get_spectrum_data():
+    # Only hold the lock long enough to snapshot the arrays, so the
+    # subscriber keeps ingesting while the caller works on the copies
     with data_lock:
-        if frequency_df.empty:
-            return None, None, None, None, None
-
-        frequencies_int = frequency_df.index.values
-        last_powers = frequency_df['last'].values
-        min_powers = frequency_df['min'].values
-        max_powers = frequency_df['max'].values
-        timestamps = frequency_df['timestamp'].values
+        sync_spectrum_grid()
 
-        # Convert frequencies to MHz for plotting
-        frequencies_mhz = frequencies_int / 1e6
+        if spectrum_hi == spectrum_lo:
+            return None, None, None, None, None
 
-        return frequencies_mhz, last_powers, min_powers, max_powers, timestamps
+        # The frequency axis is replaced, never modified, when the grid grows
+        used = slice(spectrum_lo, spectrum_hi)
+        return (spectrum_freqs_mhz, spectrum_last[used].copy(), spectrum_min[used].copy(),
+                spectrum_max[used].copy(), spectrum_ts[used].copy())
+
+def top_bins(powers, count):
+    # Indices of the (at most) count strongest seen bins, strongest first.
+    # argpartition is O(N); only the selected bins get fully sorted.
+    ranked = np.where(np.isnan(powers), -np.inf, powers)
+    count = min(count, np.count_nonzero(~np.isnan(powers)))
+    if count == 0:
+        return np.empty(0, dtype=np.intp)
+
+    idx = np.argpartition(ranked, -count)[-count:]
+    return idx[np.argsort(ranked[idx])[::-1]]
+
+def format_peak_rows(frequencies_mhz, powers):
+    # [[freq, power], ...] cell text for a peak table, formatted in bulk
+    return np.column_stack((np.char.mod('%.2f', frequencies_mhz),
+                            np.char.mod('%.2f', powers))).tolist()
+
+def update_table(table, rows, header_rows=0):
+    # Rewrite cell text in place; rows missing from `rows` are blanked
+    num_rows = max(row for row, _ in table.get_celld()) + 1
+
+    for row in range(header_rows, num_rows):
+        values = rows[row - header_rows] if row - header_rows < len(rows) else ('', '')
+        for col, value in enumerate(values):
+            table[row, col].get_text().set_text(value)
+
+# Everything a frontend needs for one redraw
+PlotUpdate = namedtuple('PlotUpdate', ['frequencies', 'last_powers', 'min_powers', 'max_powers',
+                                       'top_peaks', 'top_maxes', 'top_displayed_maxes',
+                                       'average_mps', 'num_samples'])
+
+class PlotUpdates:
+    # Redraw bookkeeping and peak selection shared by the plotting frontends
+    def __init__(self):
+        self.last_seq = None
+        self.last_mps = None
+
+    def poll(self):
+        # Skip the redraw entirely (None) when nothing was ingested since the last one
+        seq = spectrum_seq.value
+        average_mps = messages_per_second.value
+        if seq == self.last_seq and average_mps == self.last_mps:
+            return None
+
+        self.last_seq, self.last_mps = seq, average_mps
+
+        frequencies, last_powers, min_powers, max_powers, timestamps = get_spectrum_data()
+        if frequencies is None:
+            return None
+
+        # Get the top N frequencies by 'last' and 'max' power
+        top_peaks = top_bins(last_powers, DISPLAYED_PEAKS)
+        top_maxes = top_bins(max_powers, PEAK_COUNT)
+
+        return PlotUpdate(frequencies, last_powers, min_powers, max_powers,
+                          top_peaks, top_maxes, top_maxes[:DISPLAYED_PEAKS],
+                          average_mps, np.count_nonzero(~np.isnan(last_powers)))
 
 def calculate_average_messages_per_second():
-    current_time = time.time()
+    current_time = time.monotonic()
     window = 1
-    while message_timestamps and message_timestamps[0] < current_time - window:
-        message_timestamps.pop(0)
+    cutoff = current_time - window
+    while message_timestamps and message_timestamps[0] < cutoff:
+        message_timestamps.popleft()
     num_messages = len(message_timestamps)
     average_mps = num_messages / window
     return average_mps
@@ -155,7 +487,7 @@ def zmq_subscriber(args, stop_event):
     server_public_key_path = args.server_public_key
     client_public_key_bin, client_secret_key_bin, server_public_key_bin = None, None, None
 
-    context = zmq.Context()
+    context = zmq.Context.instance()
     subscriber = context.socket(zmq.SUB)
 
     if not key_dir or not server_public_key_path:
@@ -199,22 +531,55 @@ def zmq_subscriber(args, stop_event):
     else:
         print("CURVE disabled (must specify key directory and server public key path)")
 
+    # Never drop frames at the socket; bursts are absorbed by batching instead.
+    # CONFLATE would keep only the newest frame, but each frame carries a
+    # different slice of the sweep, so the spectrum needs full ingest.
+    subscriber.setsockopt(zmq.RCVHWM, 0)
+    subscriber.setsockopt(zmq.RCVBUF, 8 * 1024 * 1024)
+    subscriber.setsockopt(zmq.TCP_KEEPALIVE, 1)
     subscriber.subscribe("")
     subscriber.connect(server_address)
 
     print(f"Listening for data from {server_address} with CURVE encryption...")
 
+    # Socket.poll() builds a throwaway Poller on every call
+    poller = zmq.Poller()
+    poller.register(subscriber, zmq.POLLIN)
+
     try:
         while not stop_event.is_set():
-            if subscriber.poll(timeout=5000):
-                message = subscriber.recv()
-
-                unpacked_data = msgpack.unpackb(message, raw=False)
-                print(unpacked_data)
-                process_data(unpacked_data)
-                message_timestamps.append(time.time())
-            else:
-                continue
+            if poller.poll(timeout=1000):
+                # Drain whatever is already queued so it is merged in one update
+                frames = []
+                for _ in range(MAX_BATCH_MESSAGES):
+                    # Frames are small enough that recv(copy=False) costs more
+                    # in zmq.Frame overhead than the copy it saves
+                    try:
+                        message = subscriber.recv(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+
+                    # Every message holds exactly one frame, so each is decoded
+                    # on its own and a malformed one cannot spill into the next.
+                    # msgpack already interns map keys natively; filtering unused
+                    # keys (binwidth, fftsize) with an object_pairs_hook moves map
+                    # construction into Python and makes decoding slower, so
+                    # frames are decoded as plain dicts.
+                    try:
+                        data = msgpack.unpackb(message, raw=False, use_list=False)
+                    except (ValueError, TypeError):
+                        continue
+
+                    if isinstance(data, dict):
+                        frames.append(data)
+
+                process_data(frames)
+
+                now = time.monotonic()
+                message_timestamps.extend([now] * len(frames))
+
+            # Refreshed on idle polls too, so the rate decays to zero
+            messages_per_second.value = calculate_average_messages_per_second()
     except KeyboardInterrupt:
         print("\nSubscriber interrupted by user.")
     finally:
@@ -222,15 +587,21 @@ def zmq_subscriber(args, stop_event):
         context.term()
         print("Subscriber terminated.")
 
-def main():
-    args = parse_args()
+def subscriber_process(args, stop_event, lock, rate, seq, descriptor):
+    global data_lock, messages_per_second, spectrum_seq, grid_descriptor
 
-    stop_event = threading.Event()
+    data_lock = lock
+    messages_per_second = rate
+    spectrum_seq = seq
+    grid_descriptor = descriptor
 
-    # Start the ZeroMQ subscriber in a background thread
-    subscriber_thread = threading.Thread(target=zmq_subscriber, args=(args, stop_event))
-    subscriber_thread.start()
+    try:
+        zmq_subscriber(args, stop_event)
+    finally:
+        with data_lock:
+            release_spectrum_grid(unlink=True)
 
+def run_matplotlib_plot(args):
     fig = plt.figure(layout="constrained", figsize=(15, 10))
     gs = GridSpec(2, 2, figure=fig, width_ratios=[3, 1.5], height_ratios=[3, 1])
 
@@ -245,125 +616,94 @@ def main():
     footer_gs = gs[2:].subgridspec(2, 1)
     footer_table_ax = fig.add_subplot(footer_gs[0])
 
-    freq_label = "Freq (MHz)"
-    mag_label = "Mag (dB)"
-
-    try:
-        while True:
-            frequencies, last_powers, min_powers, max_powers, timestamps = get_spectrum_data()
+    for ax in (peak_ax, abspeak_ax, footer_table_ax):
+        ax.grid(False)
+        ax.axis('off')
 
-            graph_ax.clear()
+    graph_ax.text(0.5, 0.5, "Waiting for incoming data...")
+    abspeak_ax.text(0.5, 0.5, "...")
+    peak_ax.text(0.5, 0.5, "...")
 
-            peak_ax.clear()
-            peak_ax.grid(False)
-            peak_ax.axis('off')
-            peak_ax.set_title("Peak (Last)")
+    # Let's teach important things while waiting for data...
+    x = np.linspace(0, 10, 100)
+    y = x
 
-            abspeak_ax.clear()
-            abspeak_ax.grid(False)
-            abspeak_ax.axis('off')
-            abspeak_ax.set_title("Abs Peak (Max)")
+    subgraph_ax.plot(x, y, color='blue', linewidth=2)
+    subgraph_ax.set_title("Linear relationship in FAFO", fontsize=16, fontweight='bold')
+    subgraph_ax.set_xlabel("F'ing Around", fontsize=14)
+    subgraph_ax.set_ylabel("Finding Out", fontsize=14)
+    subgraph_ax.set_xlim(0, 10)
+    subgraph_ax.set_ylim(0, 10)
+    subgraph_ax.grid(True)
 
-            footer_table_ax.clear()
-            footer_table_ax.grid(False)
-            footer_table_ax.axis('off')
+    footer_table_ax.text(0.5, 0.5, "No ZMQ frames received.")
 
-            subgraph_ax.clear()
+    # Artists are built once the first frame arrives and then updated in place
+    plot_ready = False
 
-            if frequencies is None:
-                graph_ax.text(0.5, 0.5, "Waiting for incoming data...")
-                abspeak_ax.text(0.5, 0.5, "...")
-                peak_ax.text(0.5, 0.5, "...")
+    plt.show(block=False)
+    fig.canvas.draw_idle()
 
-                # Let's teach important things while waiting for data...
-                x = np.linspace(0, 10, 100)
-                y = x
+    updates = PlotUpdates()
+    next_refresh = 0.0
 
-                subgraph_ax.plot(x, y, color='blue', linewidth=2)
-                subgraph_ax.set_title("Linear relationship in FAFO", fontsize=16, fontweight='bold')
-                subgraph_ax.set_xlabel("F'ing Around", fontsize=14)
-                subgraph_ax.set_ylabel("Finding Out", fontsize=14)
-                subgraph_ax.set_xlim(0, 10)
-                subgraph_ax.set_ylim(0, 10)
-                subgraph_ax.grid(True)
-
-                footer_table_ax.text(0.5, 0.5, "No ZMQ frames received.")
+    try:
+        while plt.fignum_exists(fig.number):
+            fig.canvas.flush_events()
+            time.sleep(GUI_POLL_INTERVAL)
 
-                plt.draw()
-                plt.pause(1)
+            now = time.monotonic()
+            if now < next_refresh:
                 continue
 
-            frequency_min, frequency_max = frequencies.min(), frequencies.max()
-
-            if frequencies is not None:
-                graph_ax.plot(frequencies, last_powers, label='Last', color='blue')
-                graph_ax.plot(frequencies, min_powers, label='Minimum', color='green')
-                graph_ax.plot(frequencies, max_powers, label='Maximum', color='red')
-                graph_ax.set_xlabel(freq_label)
-                graph_ax.set_ylabel(mag_label)
-                graph_ax.set_title(f"RF Spectrum ({frequency_min}-{frequency_max})")
-                plt.setp(graph_ax.get_xticklabels(), rotation=45, ha='right')
-                graph_ax.grid(True)
-                graph_ax.legend()
-
-                # Set x-axis limits to data range
-                graph_ax.set_xlim(frequency_min, frequency_max)
-
-                # Adjust tick locators to prevent too many ticks
-                freq_range = frequency_max - frequency_min
-                major_tick = freq_range / 25
-                minor_tick = major_tick / 10
-
-                graph_ax.xaxis.set_major_locator(ticker.MultipleLocator(major_tick))
-                graph_ax.xaxis.set_minor_locator(ticker.MultipleLocator(minor_tick))
+            update = updates.poll()
+            if update is None:
+                continue
 
-                # Calculate average messages per second
-                average_mps = calculate_average_messages_per_second()
+            next_refresh = now + PLOT_REFRESH_INTERVAL
+            frequencies = update.frequencies
 
-                # Peak tracking variables
-                peakN = 1000
-                displayed_peak = 15
+            if not plot_ready:
+                for ax in (graph_ax, peak_ax, abspeak_ax, footer_table_ax, subgraph_ax):
+                    ax.clear()
 
-                top_peaks = None
-                top_maxes = None
+                for ax in (peak_ax, abspeak_ax, footer_table_ax):
+                    ax.grid(False)
+                    ax.axis('off')
 
-                with data_lock:
-                    if not frequency_df.empty:
-                        # Get the top N frequencies by 'last' power
-                        top_peaks = frequency_df.nlargest(peakN, 'last')
-                        top_maxes = frequency_df.nlargest(peakN, 'max')
+                peak_ax.set_title("Peak (Last)")
+                abspeak_ax.set_title("Abs Peak (Max)")
 
-                        last_peaks_table_data = []
-                        for freq, row in top_peaks.iterrows():
-                            freq_mhz = freq / 1e6
-                            power = row['last']
-                            last_peaks_table_data.append([f'{freq_mhz:.2f}', f'{power:.2f}'])
+                line_last, = graph_ax.plot([], [], label='Last', color='blue')
+                line_min, = graph_ax.plot([], [], label='Minimum', color='green')
+                line_max, = graph_ax.plot([], [], label='Maximum', color='red')
+                graph_ax.set_xlabel(FREQ_LABEL)
+                graph_ax.set_ylabel(MAG_LABEL)
+                graph_ax.grid(True)
+                graph_ax.legend()
 
-                        maxes_table_data = []
-                        for freq, row in top_maxes.iterrows():
-                            freq_mhz = freq / 1e6
-                            power = row['max']
-                            maxes_table_data.append([f'{freq_mhz:.2f}', f'{power:.2f}'])
-                    else:
-                        last_peaks_table_data = []
-                        maxes_table_data = []
+                # Table row heights follow the axes size at creation time, so lay
+                # the figure out first and keep the tables out of later layouts
+                fig.canvas.draw()
 
-                headers = [ freq_label, mag_label ]
+                empty_rows = [['', '']] * DISPLAYED_PEAKS
 
-                last_peaks_table = peak_ax.table(cellText=last_peaks_table_data[:displayed_peak], colLabels=headers, loc='center')
+                last_peaks_table = peak_ax.table(cellText=empty_rows, colLabels=PEAK_TABLE_HEADERS, loc='center')
                 last_peaks_table.auto_set_font_size(False)
                 last_peaks_table.set_fontsize(10)
                 last_peaks_table.scale(1, 1.2)
+                last_peaks_table.set_in_layout(False)
 
-                maxes_table = abspeak_ax.table(cellText=maxes_table_data[:displayed_peak], colLabels=headers, loc='center')
+                maxes_table = abspeak_ax.table(cellText=empty_rows, colLabels=PEAK_TABLE_HEADERS, loc='center')
                 maxes_table.auto_set_font_size(False)
                 maxes_table.set_fontsize(10)
                 maxes_table.scale(1, 1.2)
+                maxes_table.set_in_layout(False)
 
                 info_table_data = [
-                    ["Messages/s", average_mps ],
+                    ["Messages/s", '' ],
                     ["ZMQ Source", args.server_address ],
-                    ["Nsamples", frequencies.size ]
+                    ["Nsamples", '' ]
                 ]
 
                 info_table = footer_table_ax.table(cellText=info_table_data, loc='center', cellLoc='left')
@@ -372,27 +712,245 @@ def main():
                 info_table.auto_set_column_width([0, 1])
                 info_table.scale(1, 2)
 
-                subgraph_ax.clear()
-                max_power = top_maxes['max'].values
-                frequencies_mhz = top_maxes.index.values / 1e6
+                scatter = subgraph_ax.scatter([], [], c=[], cmap='hot', marker='x', s=10, alpha=0.8)
+                subgraph_ax.set_xlabel(FREQ_LABEL)
+                subgraph_ax.set_ylabel(MAG_LABEL)
+
+                plot_ready = True
+
+            frequency_min, frequency_max = frequencies.min(), frequencies.max()
+
+            line_last.set_data(frequencies, update.last_powers)
+            line_min.set_data(frequencies, update.min_powers)
+            line_max.set_data(frequencies, update.max_powers)
+            graph_ax.set_title(f"RF Spectrum ({frequency_min}-{frequency_max})")
+
+            # Set x-axis limits to data range, rescale y to the new data
+            graph_ax.set_xlim(frequency_min, frequency_max)
+            graph_ax.relim()
+            graph_ax.autoscale_view(scalex=False)
+
+            # Adjust tick locators to prevent too many ticks
+            freq_range = frequency_max - frequency_min
+            major_tick = freq_range / 25
+            minor_tick = major_tick / 10
+
+            graph_ax.xaxis.set_major_locator(ticker.MultipleLocator(major_tick))
+            graph_ax.xaxis.set_minor_locator(ticker.MultipleLocator(minor_tick))
+            plt.setp(graph_ax.get_xticklabels(), rotation=45, ha='right')
+
+            # Only the displayed rows are formatted
+            top_peaks = update.top_peaks
+            top_displayed_maxes = update.top_displayed_maxes
+
+            last_peaks_table_data = format_peak_rows(frequencies[top_peaks], update.last_powers[top_peaks])
+            maxes_table_data = format_peak_rows(frequencies[top_displayed_maxes],
+                                                update.max_powers[top_displayed_maxes])
+
+            update_table(last_peaks_table, last_peaks_table_data, header_rows=1)
+            update_table(maxes_table, maxes_table_data, header_rows=1)
+            update_table(info_table, [[ "Messages/s", str(update.average_mps) ],
+                                      [ "ZMQ Source", args.server_address ],
+                                      [ "Nsamples", str(update.num_samples) ]])
+
+            max_power = update.max_powers[update.top_maxes]
+            frequencies_mhz = frequencies[update.top_maxes]
+
+            scatter.set_offsets(np.column_stack((frequencies_mhz, max_power)))
+            scatter.set_array(max_power)
+            scatter.autoscale()
+
+            subgraph_ax.ignore_existing_data_limits = True
+            subgraph_ax.update_datalim(scatter.get_offsets())
+            subgraph_ax.autoscale_view()
 
-                scatter = subgraph_ax.scatter(frequencies_mhz, max_power, c=max_power,
-                                              cmap='hot', marker='x', s=10, alpha=0.8)
+            fig.canvas.draw_idle()
+    finally:
+        plt.ioff()
+        plt.close(fig)
+
+if pg is not None:
+    class PeakTableModel(QtCore.QAbstractTableModel):
+        # (frequency, power) rows for the selected peak bins; Qt only asks
+        # for the visible cells, so only those get formatted
+        def __init__(self, headers, parent=None):
+            super().__init__(parent)
+            self.headers = headers
+            self.frequencies = np.empty(0)
+            self.powers = np.empty(0)
+
+        def set_peaks(self, frequencies_mhz, powers):
+            self.beginResetModel()
+            self.frequencies = frequencies_mhz
+            self.powers = powers
+            self.endResetModel()
+
+        def rowCount(self, parent=QtCore.QModelIndex()):
+            return 0 if parent.isValid() else self.frequencies.size
+
+        def columnCount(self, parent=QtCore.QModelIndex()):
+            return 0 if parent.isValid() else len(self.headers)
+
+        def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+            if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+                return None
+
+            column = self.frequencies if index.column() == 0 else self.powers
+            return f'{column[index.row()]:.2f}'
+
+        def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+            if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+                return self.headers[section]
+            return None
+
+def run_pyqtgraph_plot(args):
+    app = pg.mkQApp("hackrf_sweeper")
+
+    window = QtWidgets.QWidget()
+    window.setWindowTitle("hackrf_sweeper")
+    window.resize(1500, 1000)
+    layout = QtWidgets.QGridLayout(window)
+
+    graph = pg.PlotWidget(title="Waiting for incoming data...")
+    graph.setLabel('bottom', FREQ_LABEL)
+    graph.setLabel('left', MAG_LABEL)
+    graph.showGrid(x=True, y=True)
+    graph.addLegend()
+
+    # connect='finite' leaves gaps at unseen (NaN) bins
+    curve_last = graph.plot(pen='b', name='Last', connect='finite')
+    curve_min = graph.plot(pen='g', name='Minimum', connect='finite')
+    curve_max = graph.plot(pen='r', name='Maximum', connect='finite')
+    layout.addWidget(graph, 0, 0, 2, 1)
+
+    tables_layout = QtWidgets.QHBoxLayout()
+    peak_model = PeakTableModel(PEAK_TABLE_HEADERS)
+    maxes_model = PeakTableModel(PEAK_TABLE_HEADERS)
+
+    for title, model in (("Peak (Last)", peak_model), ("Abs Peak (Max)", maxes_model)):
+        box = QtWidgets.QGroupBox(title)
+        view = QtWidgets.QTableView()
+        view.setModel(model)
+        view.verticalHeader().hide()
+        view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
+        QtWidgets.QVBoxLayout(box).addWidget(view)
+        tables_layout.addWidget(box)
+
+    layout.addLayout(tables_layout, 0, 1)
+
+    subgraph = pg.PlotWidget(title="Linear relationship in FAFO")
+    subgraph.setLabel('bottom', "F'ing Around")
+    subgraph.setLabel('left', "Finding Out")
+    subgraph.showGrid(x=True, y=True)
+
+    # Let's teach important things while waiting for data...
+    x = np.linspace(0, 10, 100)
+    fafo = subgraph.plot(x, x, pen=pg.mkPen('b', width=2))
+
+    scatter = pg.ScatterPlotItem(symbol='x', size=8, pen=None)
+    subgraph.addItem(scatter)
+    layout.addWidget(subgraph, 1, 1)
+
+    info = QtWidgets.QLabel("No ZMQ frames received.")
+    layout.addWidget(info, 2, 0, 1, 2)
+
+    layout.setColumnStretch(0, 2)
+    layout.setColumnStretch(1, 1)
+    layout.setRowStretch(0, 1)
+    layout.setRowStretch(1, 1)
+
+    colormap = pg.colormap.getFromMatplotlib('hot')
+
+    updates = PlotUpdates()
+
+    def refresh():
+        nonlocal fafo
+
+        update = updates.poll()
+        if update is None:
+            return
+
+        frequencies = update.frequencies
+
+        if fafo is not None:
+            subgraph.removeItem(fafo)
+            fafo = None
+            subgraph.setTitle(None)
+            subgraph.setLabel('bottom', FREQ_LABEL)
+            subgraph.setLabel('left', MAG_LABEL)
+
+        curve_last.setData(frequencies, update.last_powers)
+        curve_min.setData(frequencies, update.min_powers)
+        curve_max.setData(frequencies, update.max_powers)
+        graph.setTitle(f"RF Spectrum ({frequencies.min()}-{frequencies.max()})")
 
-                subgraph_ax.set_xlabel(freq_label)
-                subgraph_ax.set_ylabel(mag_label)
+        top_peaks = update.top_peaks
+        top_displayed_maxes = update.top_displayed_maxes
 
-                plt.draw()
-                plt.pause(1)
+        peak_model.set_peaks(frequencies[top_peaks], update.last_powers[top_peaks])
+        maxes_model.set_peaks(frequencies[top_displayed_maxes], update.max_powers[top_displayed_maxes])
 
-            time.sleep(0.5)
+        max_power = update.max_powers[update.top_maxes]
+        if max_power.size:
+            span = np.ptp(max_power) or 1.0
+            colors = colormap.map((max_power - max_power.min()) / span, mode='qcolor')
+            scatter.setData(frequencies[update.top_maxes], max_power, brush=[pg.mkBrush(color) for color in colors])
+
+        info.setText(f"Messages/s: {update.average_mps}    "
+                     f"ZMQ Source: {args.server_address}    "
+                     f"Nsamples: {update.num_samples}")
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(refresh)
+    timer.start(int(PLOT_REFRESH_INTERVAL * 1000))
+
+    # Qt does not deliver SIGINT to Python while its loop runs; quit cleanly instead
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+
+    window.show()
+    app.exec()
+
+def main():
+    global data_lock, messages_per_second, spectrum_seq, grid_descriptor
+
+    args = parse_args()
+
+    if args.frontend == 'pyqtgraph' and pg is None:
+        print("The pyqtgraph frontend requires pyqtgraph and a Qt binding to be installed.")
+        sys.exit(1)
+
+    stop_event = multiprocessing.Event()
+    data_lock = multiprocessing.Lock()
+    messages_per_second = multiprocessing.Value('d', 0.0)
+    # Bumped on every spectrum update; only written with data_lock held
+    spectrum_seq = multiprocessing.Value('Q', 0, lock=False)
+    # Also only accessed with data_lock held
+    grid_descriptor = multiprocessing.Value(SpectrumGridDescriptor, lock=False)
+
+    # Share one resource tracker with the subscriber, otherwise blocks it
+    # retires are reported as leaked when the plot process exits
+    resource_tracker.ensure_running()
+
+    # Run the ZeroMQ subscriber in its own process so ingest does not
+    # compete with the plotting frontend for the GIL
+    subscriber = multiprocessing.Process(target=subscriber_process,
+                                         args=(args, stop_event, data_lock, messages_per_second,
+                                               spectrum_seq, grid_descriptor))
+    subscriber.start()
+
+    try:
+        if args.frontend == 'pyqtgraph':
+            run_pyqtgraph_plot(args)
+        else:
+            run_matplotlib_plot(args)
     except KeyboardInterrupt:
         print("\nMain thread interrupted by user.")
     finally:
         stop_event.set()
-        subscriber_thread.join()
-        plt.ioff()
-        plt.close(fig)
+        subscriber.join()
+
+        with data_lock:
+            release_spectrum_grid()
 
         print("Exiting...")
 
@@ -227,6 +227,28 @@ static void dump_fft(hackrf_sweep_state_t *state, uint64_t frequency)
         pack_value_call; \
     } while (0)
 
+/*
+ * Power bins are sent as a msgpack bin field of little-endian IEEE 754
+ * float32s, regardless of the host byte order.
+ */
+static void msgpack_pack_power_bins(msgpack_packer *pk, const float *pwr, int count)
+{
+#if defined(__BYTE_ORDER__) && __BYTE_ORDER__ == __ORDER_BIG_ENDIAN__
+    int i;
+    uint32_t le;
+
+    msgpack_pack_bin(pk, sizeof(float) * count);
+    for (i = 0; i < count; i++) {
+        memcpy(&le, &pwr[i], sizeof(le));
+        le = __builtin_bswap32(le);
+        msgpack_pack_bin_body(pk, &le, sizeof(le));
+    }
+#else
+    msgpack_pack_bin(pk, sizeof(float) * count);
+    msgpack_pack_bin_body(pk, pwr, sizeof(float) * count);
+#endif
+}
+
 static int fft_bins_callback(void *p_state, uint64_t frequency, hackrf_transfer *transfer)
 {
     hackrf_sweep_state_t *state = (hackrf_sweep_state_t *) p_state;
@@ -250,12 +272,9 @@ static int fft_bins_callback(void *p_state, uint64_t frequency, hackrf_transfer
     MSGPACK_PACK_KV(pk, fftsize, msgpack_pack_int32(&pk, state->fft.size));
     MSGPACK_PACK_KV(pk, start, msgpack_pack_uint64(&pk, frequency));
     MSGPACK_PACK_KV(pk, end, msgpack_pack_uint64(&pk, frequency + state->sample_rate_hz / 4));
-    MSGPACK_PACK_KV(pk, pwr, {
-        msgpack_pack_array(&pk, state->fft.size / 4);
-        for (uint32_t i = 0; i < state->fft.size / 4; i++) {
-            msgpack_pack_float(&pk, state->fft.pwr[1 + (state->fft.size * 5) / 8 + i]);
-        }
-    });
+    MSGPACK_PACK_KV(pk, pwr,
+        msgpack_pack_power_bins(&pk, &state->fft.pwr[1 + (state->fft.size * 5) / 8],
+            state->fft.size / 4));
 
     MSGPACK_PACK_KV(pk, start2,
         msgpack_pack_uint64(&pk, frequency + state->sample_rate_hz / 2));
@@ -263,12 +282,9 @@ static int fft_bins_callback(void *p_state, uint64_t frequency, hackrf_transfer
     MSGPACK_PACK_KV(pk, end2,
         msgpack_pack_uint64(&pk, frequency + (state->sample_rate_hz * 3) / 4));
 
-    MSGPACK_PACK_KV(pk, pwr2, {
-        msgpack_pack_array(&pk, state->fft.size / 4);
-        for (uint32_t i = 0; i < state->fft.size / 4; i++) {
-            msgpack_pack_float(&pk, state->fft.pwr[i + 1 + (state->fft.size / 8)]);
-        }
-    });
+    MSGPACK_PACK_KV(pk, pwr2,
+        msgpack_pack_power_bins(&pk, &state->fft.pwr[1 + (state->fft.size / 8)],
+            state->fft.size / 4));
 
     #ifdef DEBUG_OUTPUT
         dump_fft(state, frequency);